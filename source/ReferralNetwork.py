@@ -2,29 +2,246 @@
 
 This module implements Parts 1-3 of the Mercor challenge:
 - Directed referral graph with constraints (no self-referral, unique referrer, acyclic)
-- Reach computations (I used BFS here)
+- Reach computations (reach sets maintained incrementally on each insert)
 - Unique reach expansion (I used greedy set cover)
 - Flow centrality (It is a simple, correct implementation via all-pairs BFS)
 
 The implementation favors clarity and correctness and complexity notes are in docstrings.
 """
 
-from collections import deque, defaultdict
-from typing import Dict, Set, List, Tuple
-import math
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import heapq
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+try:  # numba is optional; without it the BFS kernels run as plain Python
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Distance used for unreachable pairs; twice this value still fits in int32
+_UNREACHABLE = 10**9
+
+# Below this many users a process pool costs more than it saves
+_PARALLEL_MIN_USERS = 1000
+
+
+def _bfs_array(indptr: Sequence[int], indices: Sequence[int], start: int) -> List[int]:
+    """Pure-Python BFS over CSR lists returning the distance list from `start`.
+
+    The queue is a growable array('i') read through a head index, which avoids
+    the per-node overhead of a deque. Distances are -1 for unreachable nodes.
+    """
+    dist = [-1] * (len(indptr) - 1)
+    dist[start] = 0
+    queue = array("i", [start])
+    head = 0
+    while head < len(queue):
+        cur = queue[head]
+        head += 1
+        level = dist[cur] + 1
+        for nei in indices[indptr[cur]:indptr[cur + 1]]:
+            if dist[nei] == -1:
+                dist[nei] = level
+                queue.append(nei)
+    return dist
+
+
+def _all_pairs_bfs_python(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Return the V x V int32 BFS distance matrix (-1 for unreachable).
+
+    The pure-Python BFS holds the GIL, so on large graphs the sources are
+    spread over a process pool in chunks of about V / (4 * cores). This is
+    the all-pairs kernel when neither numba nor scipy is installed.
+    """
+    n = len(indptr) - 1
+    row = partial(_bfs_array, indptr.tolist(), indices.tolist())
+    workers = os.cpu_count() or 1
+    D = np.empty((n, n), dtype=np.int32)
+    if n < _PARALLEL_MIN_USERS or workers < 2:
+        for i, dist in enumerate(map(row, range(n))):
+            D[i] = dist
+        return D
+    with ProcessPoolExecutor(workers) as ex:
+        for i, dist in enumerate(ex.map(row, range(n), chunksize=max(1, n // (4 * workers)))):
+            D[i] = dist
+    return D
+
+
+def _bfs_queue(indptr, indices, start):
+    """Queue-based BFS from `start` returning int32 distances (-1 for unreachable).
+
+    Every node is enqueued at most once, so a preallocated buffer with
+    head/tail indices replaces the deque. Written as plain loops for numba.
+    """
+    n = indptr.shape[0] - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    queue = np.empty(n, dtype=np.int32)
+    dist[start] = 0
+    queue[0] = start
+    head = 0
+    tail = 1
+    while head < tail:
+        cur = queue[head]
+        head += 1
+        for j in range(indptr[cur], indptr[cur + 1]):
+            nei = indices[j]
+            if dist[nei] == -1:
+                dist[nei] = dist[cur] + 1
+                queue[tail] = nei
+                tail += 1
+    return dist
+
+
+if njit is not None:
+    _bfs_queue_jit = njit(cache=True)(_bfs_queue)
+
+    @njit(parallel=True, cache=True)
+    def _all_pairs_bfs(indptr, indices):
+        """Return the V x V int32 BFS distance matrix (-1 for unreachable).
+
+        Sources are spread over numba's thread pool (NUMBA_NUM_THREADS); each
+        BFS allocates its own buffers and writes a disjoint row, so no locking.
+        """
+        n = indptr.shape[0] - 1
+        D = np.empty((n, n), dtype=np.int32)
+        for i in prange(n):
+            D[i] = _bfs_queue_jit(indptr, indices, i)
+        return D
+else:
+    try:  # scipy is optional; only needed for all-pairs distances without numba
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import shortest_path
+    except ImportError:
+        shortest_path = None
+
+    if shortest_path is not None:
+        def _all_pairs_bfs(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+            """Return the V x V int32 BFS distance matrix (-1 for unreachable).
+
+            All V traversals run inside scipy's compiled csgraph routines.
+            """
+            n = len(indptr) - 1
+            graph = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+            dist = shortest_path(graph, directed=True, unweighted=True)
+            dist[np.isinf(dist)] = -1
+            return dist.astype(np.int32)
+    else:
+        _all_pairs_bfs = _all_pairs_bfs_python
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _centrality_counts(D):
+        """Count, for every v, the pairs (s, t) with v on a shortest s -> t path.
+
+        D holds _UNREACHABLE for unreachable pairs. Each v is independent and
+        owns its output slot; the inner t loop scans contiguous rows of D.
+        """
+        n = D.shape[0]
+        C = np.zeros(n, dtype=np.int64)
+        for v in prange(n):
+            count = 0
+            for s in range(n):
+                d_sv = D[s, v]
+                if s == v or d_sv >= _UNREACHABLE:
+                    continue
+                for t in range(n):
+                    # s == t and unreachable t can never satisfy the equality
+                    if t != v and d_sv + D[v, t] == D[s, t]:
+                        count += 1
+            C[v] = count
+        return C
+else:
+    def _centrality_counts(D: np.ndarray) -> np.ndarray:
+        """Count, for every v, the pairs (s, t) with v on a shortest s -> t path.
+
+        D holds _UNREACHABLE for unreachable pairs; each v is one vectorised
+        V x V comparison.
+        """
+        n = len(D)
+        # Only pairs s != t with t reachable from s can contribute
+        valid = D < _UNREACHABLE
+        np.fill_diagonal(valid, False)
+
+        C = np.zeros(n, dtype=np.int64)
+        for v in range(n):
+            on_path = (D[:, v, None] + D[None, v, :] == D) & valid
+            on_path[v, :] = False
+            on_path[:, v] = False
+            C[v] = np.count_nonzero(on_path)
+        return C
+
+
+def _all_pairs_bfs_cugraph(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Return the V x V int32 BFS distance matrix (-1 for unreachable) on the GPU.
+
+    Runs one cugraph.bfs per source. cudf/cugraph are imported lazily so the
+    rest of the module never pays for them.
+    """
+    try:
+        import cudf
+        import cugraph
+    except ImportError as exc:
+        raise ImportError("backend='cugraph' requires the cudf and cugraph packages") from exc
+
+    n = len(indptr) - 1
+    D = np.full((n, n), -1, dtype=np.int32)
+    np.fill_diagonal(D, 0)
+    if len(indices) == 0:
+        return D
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    graph = cugraph.Graph(directed=True)
+    graph.from_cudf_edgelist(
+        cudf.DataFrame({"src": src, "dst": indices}),
+        source="src", destination="dst", renumber=False,
+    )
+    no_path = np.iinfo(np.int32).max  # cugraph's distance for unreachable vertices
+    for i in np.flatnonzero(np.diff(indptr)):  # sources without edges only reach themselves
+        df = cugraph.bfs(graph, int(i)).to_pandas()
+        reached = df["distance"].to_numpy() != no_path
+        D[i, df["vertex"].to_numpy()[reached]] = df["distance"].to_numpy()[reached]
+    return D
+
 
 class ReferralNetwork:
     def __init__(self):
+        # user names are interned to dense int ids on first sight; everything
+        # below is keyed by id and names only appear at the public API boundary
+        self._name2id: Dict[str, int] = {}
+        self._id2name: List[str] = []
         # adjacency list: referrer -> set of direct referrals
-        self.graph: Dict[str, Set[str]] = defaultdict(set)
+        self.graph: Dict[int, Set[int]] = defaultdict(set)
         # candidate -> referrer (enforces unique referrer)
-        self.parent: Dict[str, str] = {}
+        self.parent: Dict[int, int] = {}
+        # user -> every downstream user, kept up to date by add_referral
+        self.reach: Dict[int, Set[int]] = defaultdict(set)
+        # bumped on every mutation; derived caches remember the epoch they saw
+        self._epoch = 0
+        # CSR snapshot of `graph`, rebuilt lazily by _rebuild_csr() after any mutation
+        self._csr_epoch = -1
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._indices = np.zeros(0, dtype=np.int32)
+        # every (user, reach) pair sorted desc, rebuilt by top_k_referrers when stale
+        self._sorted_reach: List[Tuple[str, int]] = []
+        self._sorted_epoch = -1
 
     # ------------------ Part 1: Graph operations ------------------
-    def add_user(self, user: str) -> None:
-        """Ensure a user exists in the graph."""
-        if user not in self.graph:
-            self.graph[user] = set()
+    def add_user(self, user: str) -> int:
+        """Ensure a user exists in the graph and return its internal id."""
+        uid = self._name2id.get(user)
+        if uid is None:
+            uid = len(self._id2name)
+            self._name2id[user] = uid
+            self._id2name.append(user)
+            self.graph[uid] = set()
+            self._epoch += 1
+        return uid
 
     def add_referral(self, referrer: str, candidate: str) -> bool:
         """Attempt to add a directed edge referrer -> candidate.
@@ -37,155 +254,255 @@ class ReferralNetwork:
         - Adding the edge must not create a cycle
         """
         # Basic user setup
-        self.add_user(referrer)
-        self.add_user(candidate)
+        r = self.add_user(referrer)
+        c = self.add_user(candidate)
 
         # No self-referrals
-        if referrer == candidate:
+        if r == c:
             return False
         # Unique referrer
-        if candidate in self.parent:
+        if c in self.parent:
             return False
         # I am Preventing cycles such that candidate should not be able to reach referrer
-        if self._is_reachable(candidate, referrer):
+        if self._is_reachable(c, r):
             return False
 
         # Add edge
-        if candidate in self.graph[referrer]:
+        if c in self.graph[r]:
             # already present - idempotent
-            self.parent.setdefault(candidate, referrer)
+            self.parent.setdefault(c, r)
             return True
 
-        self.graph[referrer].add(candidate)
-        self.parent[candidate] = referrer
+        self.graph[r].add(c)
+        self.parent[c] = r
+        self._epoch += 1
+
+        # The candidate had no referrer, so its subtree is new to every ancestor
+        new_nodes = {c} | self.reach[c]
+        anc = r
+        while anc is not None:
+            self.reach[anc] |= new_nodes
+            anc = self.parent.get(anc)
         return True
 
+    def add_referrals_bulk(self, edges: Iterable[Tuple[str, str]]) -> int:
+        """Add many referrer -> candidate edges, checking for cycles once at the end.
+
+        Self-referrals and candidates that already have a referrer are skipped, as
+        add_referral would reject them; as with add_referral, their users are kept.
+        If the batch would create a cycle, ValueError is raised; if iterating
+        `edges` raises (e.g. a malformed item), that error propagates. Either way
+        the network is left as it was: no edges from the batch and none of the
+        users it introduced. Returns the number of edges added.
+
+        Complexity: one O(V + E) cycle check for the whole batch instead of one
+        per edge; each added edge then merges its candidate's subtree into the
+        referrer's ancestors, the same reach update add_referral does, stopping
+        early where a higher edge of the batch takes over.
+        """
+        known_users = len(self._id2name)
+        added: List[Tuple[int, int]] = []
+        try:
+            for referrer, candidate in edges:
+                r = self.add_user(referrer)
+                c = self.add_user(candidate)
+                if r == c or c in self.parent:
+                    continue
+                self.graph[r].add(c)
+                self.parent[c] = r
+                added.append((r, c))
+        except BaseException:
+            self._undo_bulk(added, known_users)
+            raise
+        if not added:
+            return 0
+        self._epoch += 1
+
+        order = self._topological_order()
+        if order is None:
+            # Replay the batch on the pre-batch parent chains to report the first bad edge
+            replay = dict(self.parent)
+            for _, c in added:
+                del replay[c]
+            for r, c in added:
+                anc = r
+                while anc is not None and anc != c:
+                    anc = replay.get(anc)
+                if anc == c:
+                    break
+                replay[c] = r
+            message = f"Referral {self._id2name[r]} -> {self._id2name[c]} would create a cycle"
+            self._undo_bulk(added, known_users)
+            raise ValueError(message)
+
+        # Deepest candidates first, so reach[c] already holds the batch's edges below c.
+        # A walk can stop at the first ancestor that is itself a batch candidate:
+        # that candidate's own edge, handled later, carries everything further up.
+        position = {u: i for i, u in enumerate(order)}
+        added.sort(key=lambda edge: position[edge[1]], reverse=True)
+        candidates = {c for _, c in added}
+        for r, c in added:
+            new_nodes = {c} | self.reach[c]
+            anc = r
+            while anc is not None:
+                self.reach[anc] |= new_nodes
+                if anc in candidates:
+                    break
+                anc = self.parent.get(anc)
+        return len(added)
+
     def get_direct_referrals(self, user: str) -> List[str]:
         """Return a list of direct referrals for `user`."""
-        return list(self.graph.get(user, []))
+        uid = self._name2id.get(user)
+        if uid is None:
+            return []
+        return [self._id2name[v] for v in self.graph[uid]]
 
     # ------------------ Part 2: Reach / Top-k ------------------
     def get_total_referrals(self, user: str) -> int:
         """Return the total number of downstream referrals (direct + indirect).
 
-        Complexity: O(V + E) using BFS.
+        Complexity: O(1); reach sets are maintained incrementally by add_referral.
         """
-        return len(self._downstream_set(user))
+        uid = self._name2id.get(user)
+        return len(self.reach.get(uid, ()))
 
     def top_k_referrers(self, k: int) -> List[Tuple[str, int]]:
-        """Return top-k users by total reach as (user, reach) pairs sorted desc."""
-        counts = [(u, self.get_total_referrals(u)) for u in self.graph.keys()]
-        counts.sort(key=lambda x: x[1], reverse=True)
-        return counts[:k]
+        """Return top-k users by total reach as (user, reach) pairs sorted desc.
+
+        Complexity: O(k) slice of a cached ranking; the first call after a mutation
+        re-sorts it in O(V log V) from the maintained reach sets.
+        """
+        if self._sorted_epoch != self._epoch:
+            self._sorted_reach = sorted(
+                ((self._id2name[u], len(self.reach[u])) for u in self.graph),
+                key=lambda x: x[1], reverse=True,
+            )
+            self._sorted_epoch = self._epoch
+        return self._sorted_reach[:k]
 
     # ------------------ Part 3: Influencer metrics ------------------
     def unique_reach_expansion(self) -> List[str]:
         """My Greedy selection that return users ordered by marginal unique reach.
 
-        1. Precompute full downstream set for every user
+        1. Take the full downstream set of every user (maintained by add_referral)
         2. Repeatedly select the user who contributes the largest number of
-           not-yet-covered nodes
+           not-yet-covered nodes, re-evaluating gains lazily (Minoux)
         """
-        reach_sets = {u: self._downstream_set(u) for u in self.graph.keys()}
-        covered: Set[str] = set()
+        # reach sets as int bitmasks over user ids: gain is an AND + popcount
+        reach_bits: List[int] = [self._reach_bits(u) for u in range(len(self._id2name))]
+        covered = 0
         selected: List[str] = []
-        remaining = set(self.graph.keys())
-
-        while True:
-            best_user = None
-            best_gain = 0
-            for u in remaining:
-                gain = len(reach_sets[u] - covered)
-                if gain > best_gain:
-                    best_gain = gain
-                    best_user = u
-            if best_user is None or best_gain == 0:
-                break
-            selected.append(best_user)
-            covered |= reach_sets[best_user]
-            remaining.remove(best_user)
+        # Lazy greedy: gains only shrink as `covered` grows, so a stale heap entry
+        # is an upper bound and only the top needs re-evaluating. `stamp` records
+        # the round in which an entry's gain was exact.
+        heap = [(-bits.bit_count(), 0, u) for u, bits in enumerate(reach_bits) if bits]
+        heapq.heapify(heap)
+        rnd = 0
+
+        while heap:
+            _, stamp, u = heapq.heappop(heap)
+            if stamp != rnd:
+                gain = (reach_bits[u] & ~covered).bit_count()
+                if gain:
+                    heapq.heappush(heap, (-gain, rnd, u))
+                continue
+            selected.append(self._id2name[u])
+            covered |= reach_bits[u]
+            rnd += 1
 
         return selected
 
-    def flow_centrality(self) -> List[Tuple[str, int]]:
+    def flow_centrality(self, backend: str = "cpu") -> List[Tuple[str, int]]:
         """Simple flow-centrality (betweenness-like) via all-pairs BFS distances.
 
         For each triple (s, t, v), v != s != t, if dist(s,v)+dist(v,t) == dist(s,t)
         then v lies on at least one shortest path from s to t and we increment v's score.
 
-        Complexity: O(V*(V+E)) to compute distances + O(V^3) triple-checks in worst-case.
+        The distances are packed into an int32 V x V matrix D (unreachable pairs hold
+        a large sentinel) and the triple loop runs compiled: a numba kernel when
+        available, otherwise one vectorised NumPy comparison per v. Pass
+        backend="cugraph" to run the all-pairs BFS on a GPU instead.
+
+        Complexity: O(V*(V+E)) to compute distances + O(V^3) vectorised triple-checks.
         """
-        users = list(self.graph.keys())
+        self._rebuild_csr()
+        users = self._id2name
         # Precompute distances from every source to optimise time complexity
-        dist: Dict[str, Dict[str, int]] = {}
-        for u in users:
-            dist[u] = self._bfs_distances(u)
-
-        centrality: Dict[str, int] = defaultdict(int)
-        for s in users:
-            for t in users:
-                if s == t:
-                    continue
-                if dist[s].get(t, math.inf) == math.inf:
-                    continue
-                d_st = dist[s][t]
-                for v in users:
-                    if v == s or v == t:
-                        continue
-                    d_sv = dist[s].get(v, math.inf)
-                    d_vt = dist[v].get(t, math.inf)
-                    if d_sv + d_vt == d_st and d_sv != math.inf and d_vt != math.inf:
-                        centrality[v] += 1
-
-        items = list(centrality.items())
+        if backend == "cpu":
+            D = _all_pairs_bfs(self._indptr, self._indices)
+        elif backend == "cugraph":
+            D = _all_pairs_bfs_cugraph(self._indptr, self._indices)
+        else:
+            raise ValueError(f"Unknown backend {backend!r}; expected 'cpu' or 'cugraph'")
+        D[D < 0] = _UNREACHABLE
+
+        centrality = _centrality_counts(D)
+
+        items = [(u, c) for u, c in zip(users, centrality.tolist()) if c > 0]
         items.sort(key=lambda x: x[1], reverse=True)
         return items
 
     # ------------------ Helpers ------------------
-    def _is_reachable(self, src: str, tgt: str) -> bool:
-        """Return True if tgt reachable from src (directed). BFS."""
-        if src == tgt:
-            return True
-        visited = set()
-        q = deque([src])
-        while q:
-            cur = q.popleft()
-            for nei in self.graph.get(cur, []):
-                if nei == tgt:
-                    return True
-                if nei not in visited:
-                    visited.add(nei)
-                    q.append(nei)
+    def _is_reachable(self, src: int, tgt: int) -> bool:
+        """Return True if tgt reachable from src (directed).
+
+        Every user has at most one referrer, so the only path into tgt is its
+        parent chain: tgt is reachable iff src is tgt or one of its ancestors.
+        Complexity: O(depth of tgt).
+        """
+        anc = tgt
+        while anc is not None:
+            if anc == src:
+                return True
+            anc = self.parent.get(anc)
         return False
 
-    def _downstream_set(self, user: str) -> Set[str]:
-        """Return set of all nodes reachable from user (excluding user)."""
-        visited: Set[str] = set()
-        q = deque(self.graph.get(user, []))
-        while q:
-            cur = q.popleft()
-            if cur in visited:
-                continue
-            visited.add(cur)
-            for nei in self.graph.get(cur, []):
-                if nei not in visited:
-                    q.append(nei)
-        return visited
-
-    def _bfs_distances(self, start: str) -> Dict[str, int]:
-        """Return dictionary node->distance from start (math.inf for unreachable)."""
-        dist = {u: math.inf for u in self.graph.keys()}
-        if start not in self.graph:
-            return dist
-        dist[start] = 0
-        q = deque([start])
-        while q:
-            cur = q.popleft()
-            for nei in self.graph.get(cur, []):
-                if dist[nei] == math.inf:
-                    dist[nei] = dist[cur] + 1
-                    q.append(nei)
-        return dist
+    def _undo_bulk(self, added: List[Tuple[int, int]], known_users: int) -> None:
+        """Remove the edges `added` by a failed bulk insert and any user ids from
+        `known_users` on. _epoch stays bumped, which only makes derived caches
+        rebuild on the next query.
+        """
+        for r, c in added:
+            self.graph[r].discard(c)
+            del self.parent[c]
+        for uid in range(known_users, len(self._id2name)):
+            del self._name2id[self._id2name[uid]]
+            del self.graph[uid]
+        del self._id2name[known_users:]
+
+    def _topological_order(self) -> Optional[List[int]]:
+        """Return user ids in Kahn order (referrers first), or None on a cycle.
+
+        Every user has at most one referrer, so a user becomes ready as soon as
+        its referrer has been emitted.
+        """
+        order = [u for u in range(len(self._id2name)) if u not in self.parent]
+        i = 0
+        while i < len(order):
+            order.extend(self.graph[order[i]])
+            i += 1
+        return order if len(order) == len(self._id2name) else None
+
+    def _rebuild_csr(self) -> None:
+        """Refresh the CSR arrays (indptr/indices over int32 user ids) if stale."""
+        if self._csr_epoch == self._epoch:
+            return
+        n = len(self._id2name)
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        indices: List[int] = []
+        for u in range(n):
+            indices.extend(self.graph[u])
+            indptr[u + 1] = len(indices)
+        self._indptr = indptr
+        self._indices = np.asarray(indices, dtype=np.int32)
+        self._csr_epoch = self._epoch
+
+    def _reach_bits(self, user: int) -> int:
+        """Return the reach set of user id `user` as a bitmask over user ids."""
+        row = np.zeros(len(self._id2name), dtype=bool)
+        row[np.fromiter(self.reach.get(user, ()), dtype=np.int64)] = True
+        return int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little")
 
 
 # Simple convenience usage when running as script (manual quick smoke test)
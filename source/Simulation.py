@@ -1,4 +1,7 @@
 # This is my simulation file
+import math
+
+import numpy as np
 
 class Simulation:
     def __init__(self, initial_referrers=100, referral_capacity=10):
@@ -10,50 +13,43 @@ class Simulation:
         Simulates the growth of the referral network over the given number of days.
         Returns a list where the element at index i is the cumulative expected referrals
         at the end of day i.
-        """
-        active_referrers = self.initial_referrers
-        remaining_capacity = {i: self.referral_capacity for i in range(active_referrers)}
-        cumulative_referrals = 0
-        daily_totals = []
-
-        for day in range(days):
-            expected_new = active_referrers * p
-            expected_new = min(expected_new, sum(remaining_capacity.values()))
-            cumulative_referrals += expected_new
 
-            # Reduce capacity for each active referrer
-            reduction_per_referrer = expected_new / active_referrers if active_referrers > 0 else 0
-            for ref_id in list(remaining_capacity.keys()):
-                remaining_capacity[ref_id] -= reduction_per_referrer
-                if remaining_capacity[ref_id] <= 0:
-                    del remaining_capacity[ref_id]
-
-            active_referrers = len(remaining_capacity)
-            daily_totals.append(cumulative_referrals)
-
-        return daily_totals
+        Every referrer starts with the same capacity and is charged the same share of
+        each day's referrals, so after d days each one has referred min(p * d, capacity).
+        The whole series is that expression evaluated over all days at once, with the
+        same arithmetic as _cumulative() so days_to_target agrees with it.
+        """
+        day = np.arange(1, days + 1)
+        capacity = max(self.referral_capacity, 0)
+        return (self.initial_referrers * np.minimum(p * day, capacity)).astype(float).tolist()
 
     def days_to_target(self, p, target_total):
         """
         Calculates the minimum number of days required to reach or exceed the target referrals.
+
+        Referrals arrive at a constant active_referrers * p per day until the total
+        capacity active_referrers * referral_capacity is used up, so a division gives
+        the answer up to float rounding; it is then nudged to the first day on which
+        _cumulative() (and hence simulate) reaches the target. Returns None if the
+        target can never be reached.
         """
+        if target_total <= 0:
+            return 0
         active_referrers = self.initial_referrers
-        remaining_capacity = {i: self.referral_capacity for i in range(active_referrers)}
-        cumulative_referrals = 0
-        days = 0
-
-        while cumulative_referrals < target_total and active_referrers > 0:
-            days += 1
-            expected_new = active_referrers * p
-            expected_new = min(expected_new, sum(remaining_capacity.values()))
-            cumulative_referrals += expected_new
-
-            reduction_per_referrer = expected_new / active_referrers if active_referrers > 0 else 0
-            for ref_id in list(remaining_capacity.keys()):
-                remaining_capacity[ref_id] -= reduction_per_referrer
-                if remaining_capacity[ref_id] <= 0:
-                    del remaining_capacity[ref_id]
-
-            active_referrers = len(remaining_capacity)
-
-        return days if cumulative_referrals >= target_total else None
+        capacity = self.referral_capacity
+        if active_referrers <= 0 or p <= 0 or capacity <= 0:
+            return None
+        if target_total > active_referrers * capacity:
+            return None
+        day = max(1, math.ceil(target_total / (active_referrers * p)))
+        while day > 1 and self._cumulative(p, day - 1) >= target_total:
+            day -= 1
+        while self._cumulative(p, day) < target_total:
+            day += 1
+        return day
+
+    def _cumulative(self, p, day):
+        """
+        Cumulative expected referrals at the end of `day` (1-based), exactly as simulate computes it.
+        """
+        return self.initial_referrers * min(p * day, max(self.referral_capacity, 0))
@@ -0,0 +1,216 @@
+# tests/test_referral_network.py
+import random
+import pytest
+import source.ReferralNetwork as referral_network
+from source.ReferralNetwork import ReferralNetwork, _all_pairs_bfs, _bfs_array, _centrality_counts, _UNREACHABLE
+
+def build(edges):
+    rn = ReferralNetwork()
+    for referrer, candidate in edges:
+        assert rn.add_referral(referrer, candidate)
+    return rn
+
+# A -> B -> D -> E and A -> C
+CHAIN = [('A', 'B'), ('A', 'C'), ('B', 'D'), ('D', 'E')]
+
+def test_add_referral_constraints():
+    rn = build(CHAIN)
+    assert not rn.add_referral('A', 'A')  # self-referral
+    assert not rn.add_referral('C', 'B')  # B already has a referrer
+    assert not rn.add_referral('E', 'A')  # would close A -> ... -> E -> A
+    assert sorted(rn.get_direct_referrals('A')) == ['B', 'C']
+    assert rn.get_direct_referrals('nobody') == []
+
+def test_get_total_referrals():
+    rn = build(CHAIN)
+    totals = {u: rn.get_total_referrals(u) for u in 'ABCDE'}
+    assert totals == {'A': 4, 'B': 2, 'C': 0, 'D': 1, 'E': 0}
+    assert rn.get_total_referrals('nobody') == 0
+
+def test_reach_updates_when_a_subtree_is_attached():
+    rn = build([('X', 'Y'), ('Y', 'Z'), ('R', 'S')])
+    assert rn.add_referral('Z', 'R')  # R's subtree moves under X -> Y -> Z
+    assert rn.get_total_referrals('X') == 4
+    assert rn.get_total_referrals('Y') == 3
+
+def test_top_k_referrers():
+    rn = build(CHAIN)
+    assert rn.top_k_referrers(2) == [('A', 4), ('B', 2)]
+    # ties keep insertion order
+    assert rn.top_k_referrers(10) == [('A', 4), ('B', 2), ('D', 1), ('C', 0), ('E', 0)]
+
+def test_top_k_referrers_sees_new_referrals():
+    rn = build(CHAIN)
+    assert rn.top_k_referrers(1) == [('A', 4)]
+    rn.add_referral('Z', 'A')
+    assert rn.top_k_referrers(1) == [('Z', 5)]
+
+def test_unique_reach_expansion():
+    # A's reach contains B's, so B adds nothing once A is picked
+    assert build(CHAIN).unique_reach_expansion() == ['A']
+    rn = build([('X', 'Y'), ('Y', 'Z'), ('P', 'Q'), ('P', 'R'), ('P', 'S')])
+    assert rn.unique_reach_expansion() == ['P', 'X']
+    assert ReferralNetwork().unique_reach_expansion() == []
+
+def test_flow_centrality():
+    result = build(CHAIN).flow_centrality()
+    # B lies on A->D and A->E; D lies on A->E and B->E
+    assert dict(result) == {'B': 2, 'D': 2}
+    scores = [c for _, c in result]
+    assert scores == sorted(scores, reverse=True)
+
+def test_flow_centrality_star_has_no_intermediaries():
+    assert build([('A', 'B'), ('A', 'C'), ('A', 'D')]).flow_centrality() == []
+    assert ReferralNetwork().flow_centrality() == []
+
+def test_flow_centrality_unknown_backend():
+    with pytest.raises(ValueError):
+        build(CHAIN).flow_centrality(backend='nope')
+
+def random_forest(seed, n=60):
+    rng = random.Random(seed)
+    rn = ReferralNetwork()
+    for i in range(1, n):
+        if rng.random() < 0.8:
+            rn.add_referral(f'u{rng.randrange(i)}', f'u{i}')
+        else:
+            rn.add_user(f'u{i}')
+    return rn
+
+@pytest.mark.parametrize("seed", range(3))
+def test_distance_kernel_matches_pure_python_bfs(seed):
+    rn = random_forest(seed)
+    rn._rebuild_csr()
+    indptr, indices = rn._indptr.tolist(), rn._indices.tolist()
+    expected = [_bfs_array(indptr, indices, i) for i in range(len(indptr) - 1)]
+    assert _all_pairs_bfs(rn._indptr, rn._indices).tolist() == expected
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_python_all_pairs_kernel_matches_bfs_rows(monkeypatch, parallel):
+    rn = random_forest(7, n=80)
+    rn._rebuild_csr()
+    if parallel:
+        # force the process-pool branch even on small graphs and single-core machines;
+        # spawn, because forking after numba has started its thread pool can deadlock
+        monkeypatch.setattr(referral_network, "_PARALLEL_MIN_USERS", 0)
+        monkeypatch.setattr(referral_network.os, "cpu_count", lambda: 2)
+        monkeypatch.setattr(referral_network, "ProcessPoolExecutor",
+                            partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    indptr, indices = rn._indptr.tolist(), rn._indices.tolist()
+    expected = [_bfs_array(indptr, indices, i) for i in range(len(indptr) - 1)]
+    D = referral_network._all_pairs_bfs_python(rn._indptr, rn._indices)
+    assert D.dtype == 'int32'
+    assert D.tolist() == expected
+
+@pytest.mark.parametrize("seed", range(3))
+def test_centrality_kernel_matches_triple_loop(seed):
+    rn = random_forest(seed, n=25)
+    rn._rebuild_csr()
+    D = _all_pairs_bfs(rn._indptr, rn._indices)
+    D[D < 0] = _UNREACHABLE
+    n = len(D)
+    expected = [0] * n
+    for s in range(n):
+        for t in range(n):
+            if s == t or D[s, t] >= _UNREACHABLE:
+                continue
+            for v in range(n):
+                if v not in (s, t) and D[s, v] + D[v, t] == D[s, t]:
+                    expected[v] += 1
+    assert _centrality_counts(D).tolist() == expected
+
+def snapshot(rn):
+    return (
+        {u: set(vs) for u, vs in rn.graph.items()},
+        dict(rn.parent),
+        {u: set(vs) for u, vs in rn.reach.items() if vs},
+        list(rn._id2name),
+        dict(rn._name2id),
+    )
+
+@pytest.mark.parametrize("seed", range(20))
+def test_add_referrals_bulk_matches_add_referral(seed):
+    rng = random.Random(seed)
+    n = rng.randint(2, 25)
+    # ranking users by a random order makes every batch acyclic
+    order = [f'u{i}' for i in range(n)]
+    rng.shuffle(order)
+    edges = []
+    for _ in range(rng.randint(0, 2 * n)):
+        a, b = sorted(rng.sample(range(n), 2))
+        edges.append((order[a], order[b]))
+    edges.append((order[0], order[0]))
+
+    one_by_one, bulk = ReferralNetwork(), ReferralNetwork()
+    accepted = sum(one_by_one.add_referral(r, c) for r, c in edges)
+    assert bulk.add_referrals_bulk(edges) == accepted
+    assert snapshot(bulk) == snapshot(one_by_one)
+    assert bulk.top_k_referrers(n) == one_by_one.top_k_referrers(n)
+
+def test_add_referrals_bulk_updates_reach_of_existing_ancestors():
+    # batch edges nest (C -> D -> E) and hang below an existing chain A -> B
+    batch = [('D', 'E'), ('B', 'C'), ('C', 'D'), ('X', 'Y'), ('A', 'Z')]
+    one_by_one, bulk = build([('A', 'B')]), build([('A', 'B')])
+    for r, c in batch:
+        one_by_one.add_referral(r, c)
+    assert bulk.add_referrals_bulk(batch) == 5
+    assert snapshot(bulk) == snapshot(one_by_one)
+    assert bulk.get_total_referrals('A') == 5
+    assert bulk.get_total_referrals('C') == 2
+
+def test_add_referrals_bulk_returns_count_and_skips_rejected_edges():
+    rn = build([('A', 'B')])
+    added = rn.add_referrals_bulk([
+        ('B', 'C'),
+        ('C', 'C'),  # self-referral
+        ('A', 'C'),  # C already referred by B
+        ('X', 'B'),  # B already referred by A
+        ('C', 'D'),
+    ])
+    assert added == 2
+    assert rn.get_total_referrals('A') == 3
+    assert rn.get_direct_referrals('X') == []
+    assert rn.add_referrals_bulk([]) == 0
+
+def test_add_referrals_bulk_names_first_cycle_edge():
+    rn = build([('A', 'B')])
+    # D -> A closes A -> B -> C -> D -> A; C -> A would too, but comes later
+    with pytest.raises(ValueError, match="Referral D -> A would create a cycle"):
+        rn.add_referrals_bulk([('B', 'C'), ('C', 'D'), ('D', 'A'), ('C', 'A')])
+
+def test_add_referrals_bulk_failure_leaves_network_unchanged():
+    rn = build(CHAIN)
+    before = snapshot(rn)
+    with pytest.raises(ValueError):
+        rn.add_referrals_bulk([('E', 'F'), ('X', 'Y'), ('F', 'A')])
+    assert snapshot(rn) == before
+    assert rn.get_total_referrals('A') == 4
+    assert rn.top_k_referrers(1) == [('A', 4)]
+    # the network is still usable afterwards
+    assert rn.add_referral('E', 'F')
+    assert rn.get_total_referrals('A') == 5
+
+def test_add_referrals_bulk_failing_iterable_leaves_network_unchanged():
+    rn = build([('A', 'X')])
+    before = snapshot(rn)
+
+    def edges():
+        yield ('A', 'B')
+        yield ('B', 'C')
+        raise RuntimeError("source broke")
+
+    with pytest.raises(RuntimeError):
+        rn.add_referrals_bulk(edges())
+    assert snapshot(rn) == before
+    assert rn.get_direct_referrals('A') == ['X']
+    # reach stays consistent for later inserts
+    assert rn.add_referral('Y', 'A')
+    assert rn.get_total_referrals('Y') == 2
+
+def test_add_referrals_bulk_malformed_item_leaves_network_unchanged():
+    rn = build(CHAIN)
+    before = snapshot(rn)
+    with pytest.raises(ValueError):
+        rn.add_referrals_bulk([('E', 'F'), ('F', 'G', 'H')])
+    assert snapshot(rn) == before
+    assert rn.get_total_referrals('A') == 4
@@ -0,0 +1,88 @@
+# tests/test_simulation.py
+import math
+import pytest
+from source.Simulation import Simulation
+
+def test_simulate_basic_growth():
+    sim = Simulation(initial_referrers=10, referral_capacity=5)
+    result = sim.simulate(p=1.0, days=3)
+    assert len(result) == 3
+    assert result[0] > 0  # First day should have growth
+    assert result[1] >= result[0]  # Cumulative should be non-decreasing or increasing
+
+def test_simulate_zero_probability():
+    sim = Simulation(initial_referrers=10, referral_capacity=5)
+    result = sim.simulate(p=0.0, days=5)
+    assert all(val == 0 for val in result)  # No growth expected
+
+def test_simulate_capacity_limit():
+    sim = Simulation(initial_referrers=2, referral_capacity=1)
+    result = sim.simulate(p=5, days=3)
+    # Capacity is so small that growth should stop quickly
+    assert result[-1] <= 2  # Max total referrals possible
+
+def test_days_to_target_exact_hit():
+    sim = Simulation(initial_referrers=5, referral_capacity=2)
+    days = sim.days_to_target(p=1.0, target_total=5)
+    assert isinstance(days, int)
+    assert days > 0
+
+def test_days_to_target_unachievable():
+    sim = Simulation(initial_referrers=1, referral_capacity=1)
+    days = sim.days_to_target(p=0.0, target_total=5)
+    assert days is None
+
+def test_days_to_target_zero_probability_with_capacity_left():
+    # used to loop forever: nobody refers, but nobody runs out of capacity either
+    sim = Simulation(initial_referrers=10, referral_capacity=5)
+    assert sim.days_to_target(p=0.0, target_total=1) is None
+    assert sim.days_to_target(p=0.0, target_total=0) == 0
+
+def test_days_to_target_capacity_edge():
+    # targets at or near the capacity edge, where the old day-by-day loop drifted
+    assert Simulation(initial_referrers=2, referral_capacity=2.5).days_to_target(p=0.1, target_total=5) == 25
+    assert Simulation(initial_referrers=1, referral_capacity=1).days_to_target(p=0.3, target_total=1) == 4
+    assert Simulation(initial_referrers=1, referral_capacity=5).days_to_target(p=0.1, target_total=1) == 10
+    # one referral past the total capacity is unreachable
+    assert Simulation(initial_referrers=2, referral_capacity=2.5).days_to_target(p=0.1, target_total=5.01) is None
+
+@pytest.mark.parametrize("initial_referrers, referral_capacity, p, target_total", [
+    (1, 3, 0.3, 2.1),
+    (1, 1, 0.03, 0.9),
+    (1, 1, 0.1, 1.0),
+    (2, 2.5, 0.1, 5),
+    (5, 10, 0.01, 3),
+    (10, 2.5, 0.01, 13),
+    (100, 10, 0.3, 1000),
+    (3, 4, 7, 12),
+])
+def test_days_to_target_agrees_with_simulate(initial_referrers, referral_capacity, p, target_total):
+    sim = Simulation(initial_referrers=initial_referrers, referral_capacity=referral_capacity)
+    days = sim.days_to_target(p=p, target_total=target_total)
+    result = sim.simulate(p=p, days=days)
+    assert result[-1] >= target_total  # reached on the returned day...
+    if days > 1:
+        assert result[-2] < target_total  # ...and not the day before
+
+def test_simulate_partial_last_day():
+    sim = Simulation(initial_referrers=1, referral_capacity=1)
+    result = sim.simulate(p=0.3, days=5)
+    # 0.3 per day until only 0.1 of capacity is left, then nothing
+    assert result == pytest.approx([0.3, 0.6, 0.9, 1.0, 1.0])
+
+# Optional: If implementing min_bonus_for_target
+@pytest.mark.xfail(raises=ImportError, reason="min_bonus_for_target is not implemented yet")
+def test_min_bonus_for_target():
+    def fake_adoption_prob(bonus):
+        return min(1.0, bonus / 100.0)  # Simple linear scaling
+
+    from source.Simulation import min_bonus_for_target
+    bonus = min_bonus_for_target(
+        days=5,
+        target_hires=10,
+        adoption_prob=fake_adoption_prob,
+        eps=1e-3
+    )
+    assert bonus % 10 == 0
+    assert bonus >= 0
+# these are my functions to operate
\ No newline at end of file